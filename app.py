@@ -3,13 +3,116 @@ Flask web application for Article Analyzer
 """
 
 import os
+import functools
+import threading
+import time
+from collections import OrderedDict
+import orjson
 from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
-from article_analyzer import ArticleAnalyzer
+from article_analyzer import ArticleAnalyzer, sentence_record
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson, falling back to Flask's default() for other types."""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
+# Upper bounds on analysis size, for performance reasons
+MAX_SENTENCES = 50
+MAX_CLAIMS = 10
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after insertion."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+# Recent /api/analyze responses, keyed on the request parameters
+_RESULT_CACHE = TTLCache(maxsize=512, ttl=600)
+
+@functools.lru_cache(maxsize=8)
+def get_analyzer(model_name):
+    """Return a shared ArticleAnalyzer for the given model, creating it on first use."""
+    return ArticleAnalyzer(model_name=model_name)
+
+def _clamp_int(raw, default, lo, hi):
+    """
+    Parse a request parameter as an int clamped to [lo, hi] (hi may be None).
+
+    Returns (value, limited), where limited says whether the value was lowered to `hi`.
+    Empty or missing values fall back to `default`; unparseable values give a value of None.
+    """
+    try:
+        value = int(raw) if raw not in (None, '') else default
+    except (TypeError, ValueError):
+        return None, False
+    value = max(value, lo)
+    if hi is not None and value > hi:
+        return hi, True
+    return value, False
+
+def _summarize_results(results):
+    """
+    Convert SentenceAnalysis results into plain dicts for templates and JSON.
+
+    Returns (sentences_data, total_sentences, total_claims, article_microlies),
+    computed in a single pass over the results.
+    """
+    sentences_data = []
+    total_claims = 0
+    article_microlies = 0
+    for analysis in results:
+        total_claims += len(analysis.claims)
+        article_microlies += analysis.sentence_microlies
+        sentences_data.append(sentence_record(analysis))
+    return sentences_data, len(sentences_data), total_claims, article_microlies
+
+def _has_failures(results):
+    """Whether any sentence's claim extraction, or any claim's scoring, failed."""
+    return any(
+        analysis.extraction_failed or any(
+            claim.interpretation_explanation.startswith("Error:") or claim.truth_explanation.startswith("Error:")
+            for claim in analysis.claims
+        )
+        for analysis in results
+    )
+
 @app.route('/')
 def index():
     """Main page with form to analyze articles."""
@@ -27,19 +130,10 @@ def index():
                          skip_sentences=skip_sentences,
                          llm_model=llm_model)
 
-@app.route('/analyze', methods=['POST'])
-def analyze_article():
-    """Analyze an article and return results."""
+def _do_analysis(input_method, url, article_text, max_sentences, max_claims,
+                 skip_sentences, llm_model, default_skip_sentences):
+    """Validate raw request parameters, run the analysis and render the results page."""
     try:
-        # Get form data
-        input_method = request.form.get('input_method', 'url')
-        url = request.form.get('url', '').strip()
-        article_text = request.form.get('article_text', '').strip()
-        max_sentences = request.form.get('max_sentences', '')
-        max_claims = request.form.get('max_claims', '')
-        skip_sentences = request.form.get('skip_sentences', '0')
-        llm_model = request.form.get('llm_model', 'gpt-4o-mini')
-        
         # Validate input
         if input_method == 'url':
             if not url:
@@ -52,26 +146,23 @@ def analyze_article():
                 return redirect(url_for('index'))
             article_source = "Direct Text Input"
         
-        # Convert parameters to integers with limits
-        try:
-            max_sentences = int(max_sentences) if max_sentences else 5
-            max_claims = int(max_claims) if max_claims else 10
-            skip_sentences = int(skip_sentences) if skip_sentences else 5
-            
-            # Enforce maximums
-            if max_sentences > 50:
-                flash('Maximum sentences limited to 50 for performance reasons', 'warning')
-                max_sentences = 50
-            if max_claims > 10:
-                flash('Maximum claims per sentence limited to 10 for performance reasons', 'warning')
-                max_claims = 10
-                
-        except ValueError:
+        # Convert parameters to integers within limits
+        max_sentences, sentences_limited = _clamp_int(max_sentences, 5, 1, MAX_SENTENCES)
+        max_claims, claims_limited = _clamp_int(max_claims, 10, 1, MAX_CLAIMS)
+        skip_sentences, _ = _clamp_int(skip_sentences, default_skip_sentences, 0, None)
+        if None in (max_sentences, max_claims, skip_sentences):
             flash('Please provide valid numbers for sentence and claim limits', 'error')
             return redirect(url_for('index'))
+        limits = []
+        if sentences_limited:
+            limits.append(f'sentences limited to {MAX_SENTENCES}')
+        if claims_limited:
+            limits.append(f'claims per sentence limited to {MAX_CLAIMS}')
+        if limits:
+            flash(f'Maximum {" and ".join(limits)} for performance reasons', 'warning')
         
-        # Create analyzer and run analysis
-        analyzer = ArticleAnalyzer(model_name=llm_model)
+        # Get analyzer and run analysis
+        analyzer = get_analyzer(llm_model)
         
         try:
             if input_method == 'url':
@@ -94,30 +185,8 @@ def analyze_article():
             flash(f'Analysis failed: {str(e)}', 'error')
             return redirect(url_for('index'))
         
-        # Prepare data for template
-        sentences_data = []
-        for analysis in results:
-            sentence_data = {
-                "sentence": analysis.sentence,
-                "sentence_microlies": analysis.sentence_microlies,
-                "claims": [
-                    {
-                        "text": claim.text,
-                        "probability_interpreted": claim.probability_interpreted,
-                        "probability_true": claim.probability_true,
-                        "interpretation_explanation": claim.interpretation_explanation,
-                        "truth_explanation": claim.truth_explanation,
-                        "microlies": claim.microlies
-                    }
-                    for claim in analysis.claims
-                ]
-            }
-            sentences_data.append(sentence_data)
-        
-        # Calculate summary statistics
-        total_sentences = len(results)
-        total_claims = sum(len(analysis.claims) for analysis in results)
-        article_microlies = sum(analysis.sentence_microlies for analysis in results)
+        # Prepare data for template and summary statistics
+        sentences_data, total_sentences, total_claims, article_microlies = _summarize_results(results)
         
         summary = {
             "url": source_url,
@@ -143,6 +212,20 @@ def analyze_article():
         flash(f'Error analyzing article: {str(e)}', 'error')
         return redirect(url_for('index'))
 
+@app.route('/analyze', methods=['POST'])
+def analyze_article():
+    """Analyze an article and return results."""
+    return _do_analysis(
+        input_method=request.form.get('input_method', 'url'),
+        url=request.form.get('url', '').strip(),
+        article_text=request.form.get('article_text', '').strip(),
+        max_sentences=request.form.get('max_sentences', ''),
+        max_claims=request.form.get('max_claims', ''),
+        skip_sentences=request.form.get('skip_sentences', '0'),
+        llm_model=request.form.get('llm_model', 'gpt-4o-mini'),
+        default_skip_sentences=5
+    )
+
 @app.route('/api/analyze', methods=['POST'])
 def api_analyze():
     """API endpoint for programmatic access."""
@@ -153,19 +236,21 @@ def api_analyze():
             return jsonify({'error': 'URL is required'}), 400
         
         url = data['url']
-        max_sentences = data.get('max_sentences', 5)
-        max_claims = data.get('max_claims', 10)
-        skip_sentences = data.get('skip_sentences', 5)
+        max_sentences, _ = _clamp_int(data.get('max_sentences'), 5, 1, MAX_SENTENCES)
+        max_claims, _ = _clamp_int(data.get('max_claims'), 10, 1, MAX_CLAIMS)
+        skip_sentences, _ = _clamp_int(data.get('skip_sentences'), 5, 0, None)
         llm_model = data.get('llm_model', 'gpt-4o-mini')
         
-        # Enforce maximums
-        if max_sentences and max_sentences > 50:
-            max_sentences = 50
-        if max_claims and max_claims > 10:
-            max_claims = 10
+        if None in (max_sentences, max_claims, skip_sentences):
+            return jsonify({'error': 'max_sentences, max_claims and skip_sentences must be integers'}), 400
+        
+        cache_key = (url, max_sentences, max_claims, skip_sentences, llm_model)
+        cached = _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
         
-        # Create analyzer and run analysis
-        analyzer = ArticleAnalyzer(model_name=llm_model)
+        # Get analyzer and run analysis
+        analyzer = get_analyzer(llm_model)
         results = analyzer.analyze_article(
             url, 
             max_sentences=max_sentences, 
@@ -173,30 +258,8 @@ def api_analyze():
             skip_sentences=skip_sentences
         )
         
-        # Format response
-        sentences_data = []
-        for analysis in results:
-            sentence_data = {
-                "sentence": analysis.sentence,
-                "sentence_microlies": analysis.sentence_microlies,
-                "claims": [
-                    {
-                        "text": claim.text,
-                        "probability_interpreted": claim.probability_interpreted,
-                        "probability_true": claim.probability_true,
-                        "interpretation_explanation": claim.interpretation_explanation,
-                        "truth_explanation": claim.truth_explanation,
-                        "microlies": claim.microlies
-                    }
-                    for claim in analysis.claims
-                ]
-            }
-            sentences_data.append(sentence_data)
-        
-        # Calculate summary
-        total_sentences = len(results)
-        total_claims = sum(len(analysis.claims) for analysis in results)
-        article_microlies = sum(analysis.sentence_microlies for analysis in results)
+        # Format response and summary statistics
+        sentences_data, total_sentences, total_claims, article_microlies = _summarize_results(results)
         
         response = {
             "article_microlies": article_microlies,
@@ -204,6 +267,9 @@ def api_analyze():
             "total_claims": total_claims,
             "sentences": sentences_data
         }
+        # Don't let a transient LLM failure be served from the cache for the next ten minutes
+        if not _has_failures(results):
+            _RESULT_CACHE.set(cache_key, response)
         
         return jsonify(response)
     
@@ -213,97 +279,16 @@ def api_analyze():
 @app.route('/analyze')
 def analyze_get():
     """Analyze an article via GET request with URL parameters."""
-    try:
-        # Get URL parameters
-        url = request.args.get('url', '').strip()
-        max_sentences = request.args.get('max_sentences', '5')
-        max_claims = request.args.get('max_claims', '10')
-        skip_sentences = request.args.get('skip_sentences', '3')
-        llm_model = request.args.get('llm_model', 'gpt-4o-mini')
-        
-        # Validate URL
-        if not url:
-            flash('Please provide a URL to analyze', 'error')
-            return redirect(url_for('index'))
-        
-        # Convert parameters to integers with limits
-        try:
-            max_sentences = int(max_sentences) if max_sentences else 5
-            max_claims = int(max_claims) if max_claims else 10
-            skip_sentences = int(skip_sentences) if skip_sentences else 3
-            
-            # Enforce maximums
-            if max_sentences > 50:
-                max_sentences = 50
-            if max_claims > 10:
-                max_claims = 10
-                
-        except ValueError:
-            flash('Please provide valid numbers for sentence and claim limits', 'error')
-            return redirect(url_for('index'))
-        
-        # Create analyzer and run analysis
-        analyzer = ArticleAnalyzer(model_name=llm_model)
-        
-        try:
-            results = analyzer.analyze_article(
-                url, 
-                max_sentences=max_sentences, 
-                max_claims=max_claims, 
-                skip_sentences=skip_sentences
-            )
-        except Exception as e:
-            flash(f'Analysis failed: {str(e)}', 'error')
-            return redirect(url_for('index'))
-        
-        # Prepare data for template (same as POST route)
-        sentences_data = []
-        for analysis in results:
-            sentence_data = {
-                "sentence": analysis.sentence,
-                "sentence_microlies": analysis.sentence_microlies,
-                "claims": [
-                    {
-                        "text": claim.text,
-                        "probability_interpreted": claim.probability_interpreted,
-                        "probability_true": claim.probability_true,
-                        "interpretation_explanation": claim.interpretation_explanation,
-                        "truth_explanation": claim.truth_explanation,
-                        "microlies": claim.microlies
-                    }
-                    for claim in analysis.claims
-                ]
-            }
-            sentences_data.append(sentence_data)
-        
-        # Calculate summary statistics
-        total_sentences = len(results)
-        total_claims = sum(len(analysis.claims) for analysis in results)
-        article_microlies = sum(analysis.sentence_microlies for analysis in results)
-        
-        summary = {
-            "url": url,
-            "total_sentences": total_sentences,
-            "total_claims": total_claims,
-            "article_microlies": article_microlies,
-            "avg_claims_per_sentence": total_claims / total_sentences if total_sentences > 0 else 0,
-            "avg_microlies_per_sentence": article_microlies / total_sentences if total_sentences > 0 else 0,
-            "avg_microlies_per_claim": article_microlies / total_claims if total_claims > 0 else 0,
-            "analysis_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            # Include parameters for sharing
-            "max_sentences": max_sentences,
-            "max_claims": max_claims,
-            "skip_sentences": skip_sentences,
-            "llm_model": llm_model
-        }
-        
-        return render_template('results.html', 
-                             sentences=sentences_data, 
-                             summary=summary)
-    
-    except Exception as e:
-        flash(f'Error analyzing article: {str(e)}', 'error')
-        return redirect(url_for('index'))
+    return _do_analysis(
+        input_method='url',
+        url=request.args.get('url', '').strip(),
+        article_text='',
+        max_sentences=request.args.get('max_sentences', '5'),
+        max_claims=request.args.get('max_claims', '10'),
+        skip_sentences=request.args.get('skip_sentences', '3'),
+        llm_model=request.args.get('llm_model', 'gpt-4o-mini'),
+        default_skip_sentences=3
+    )
 
 @app.route('/health')
 def health_check():
@@ -14,14 +14,48 @@ import os
 import re
 import json
 import asyncio
-from typing import List
+import hashlib
+import math
+import operator
+import string
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
 from dataclasses import dataclass
 import requests
+from openai import OpenAI
 from bs4 import BeautifulSoup
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+try:
+    # Optional: C++ sentence segmenter that handles abbreviations and quotes better than the regex fallback
+    import blingfire
+except ImportError:
+    blingfire = None
+
+try:
+    # Optional: lxml-based article extraction with boilerplate (nav, footer, comments) removal
+    import trafilatura
+except ImportError:
+    trafilatura = None
+
+try:
+    # Optional: Rust-backed JSON, several times faster than the stdlib json module
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional: vectorized microlies when scoring many claims at once
+    import numpy as np
+except ImportError:
+    np = None
 
 
 @dataclass
@@ -41,13 +75,337 @@ class SentenceAnalysis:
     sentence: str
     claims: List[Claim]
     sentence_microlies: float
+    # True when claim extraction failed, so `claims` is empty for lack of an answer
+    extraction_failed: bool = False
+
+
+class ProbabilityResponse(BaseModel):
+    """Structured output of the interpretation and truth probability prompts."""
+    explanation: str = Field(description="Brief explanation of your reasoning")
+    probability: float = Field(description="Probability between 0 and 1")
+    
+    def as_tuple(self) -> tuple[float, str]:
+        return max(0.0, min(1.0, self.probability)), self.explanation
+
+
+class CombinedProbabilityResponse(BaseModel):
+    """Structured output of the combined interpretation and truth probability prompt."""
+    interp_explanation: str = Field(description="Brief explanation of your interpretation reasoning")
+    interp_prob: float = Field(description="Probability between 0 and 1 that the author is interpreted as making the claim")
+    truth_explanation: str = Field(description="Brief explanation of your truth reasoning")
+    truth_prob: float = Field(description="Probability between 0 and 1 that the claim is true")
+    
+    def as_tuple(self) -> tuple[float, str, float, str]:
+        return (
+            max(0.0, min(1.0, self.interp_prob)), self.interp_explanation,
+            max(0.0, min(1.0, self.truth_prob)), self.truth_explanation
+        )
+
+
+def compute_microlies(probabilities_interpreted: List[float], probabilities_true: List[float]) -> List[float]:
+    """Microlies for parallel lists of probabilities, in one NumPy operation when NumPy is installed."""
+    if np is not None:
+        p_interpreted = np.asarray(probabilities_interpreted, dtype=np.float64)
+        p_false = 1.0 - np.asarray(probabilities_true, dtype=np.float64)
+        return ((p_interpreted * p_false) ** 3 * 1000000).tolist()
+    return [(p_i * (1.0 - p_t)) ** 3 * 1000000 for p_i, p_t in zip(probabilities_interpreted, probabilities_true)]
+
+
+def build_claim(text: str, probability_interpreted: float, interpretation_explanation: str,
+                probability_true: float, truth_explanation: str, microlies: float = None) -> Claim:
+    """Create a Claim from its two probability estimates, computing its microlies unless given."""
+    if microlies is None:
+        # Calculate microlies: (p(claim made) * p(claim false))^3
+        prob_false = 1.0 - probability_true
+        microlies = (probability_interpreted * prob_false) ** 3 * 1000000
+    
+    return Claim(
+        text=text,
+        probability_interpreted=probability_interpreted,
+        probability_true=probability_true,
+        interpretation_explanation=interpretation_explanation,
+        truth_explanation=truth_explanation,
+        microlies=microlies
+    )
+
+
+# Claim fields in result records; the interned keys are shared by every claim dict
+_CLAIM_KEYS = tuple(sys.intern(key) for key in (
+    "text", "probability_interpreted", "probability_true",
+    "interpretation_explanation", "truth_explanation", "microlies"
+))
+_get_claim_fields = operator.attrgetter(*_CLAIM_KEYS)
+
+
+def sentence_record(analysis: SentenceAnalysis) -> dict:
+    """Plain-dict form of a SentenceAnalysis, as written to result files and served by the web app."""
+    return {
+        "sentence": analysis.sentence,
+        "sentence_microlies": analysis.sentence_microlies,
+        "claims": [dict(zip(_CLAIM_KEYS, _get_claim_fields(claim))) for claim in analysis.claims]
+    }
+
+
+class SemanticCache:
+    """
+    Cache of (probability, explanation) results keyed on text embeddings.
+    
+    A lookup hits when the cosine similarity between the query and a stored embedding is at
+    least `threshold`. Entries are evicted oldest-first beyond `maxsize`. Thread-safe, so one
+    cache can be shared by analyzers serving concurrent requests.
+    
+    With NumPy installed the normalized embeddings are rows of one float32 matrix, used as a ring
+    buffer, so a lookup is a single matrix-vector product; otherwise they are scanned in Python.
+    """
+    
+    def __init__(self, threshold: float = 0.92, maxsize: int = 2000):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        # (maxsize, dimensions) array allocated on the first add with NumPy, else a list of lists
+        self._vectors = None if np is not None else []
+        self._values = []
+        self._next = 0  # slot the next entry is written to, the oldest once the cache is full
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(vector: List[float]):
+        if np is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            return vector / (np.linalg.norm(vector) or 1.0)
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+    
+    def lookup(self, vector: List[float]):
+        """Return the value stored for the most similar embedding, or None if none is similar enough."""
+        query = self._normalize(vector)
+        with self._lock:
+            count = len(self._values)
+            if not count:
+                return None
+            if np is not None:
+                scores = self._vectors[:count] @ query
+                best = int(scores.argmax())
+                return self._values[best] if scores[best] >= self.threshold else None
+            best_score, best_value = self.threshold, None
+            for candidate, value in zip(self._vectors, self._values):
+                score = sum(a * b for a, b in zip(query, candidate))
+                if score >= best_score:
+                    best_score, best_value = score, value
+            return best_value
+    
+    def add(self, vector: List[float], value):
+        vector = self._normalize(vector)
+        with self._lock:
+            slot = self._next
+            self._next = (slot + 1) % self.maxsize
+            if np is not None:
+                if self._vectors is None:
+                    self._vectors = np.empty((self.maxsize, len(vector)), dtype=np.float32)
+                self._vectors[slot] = vector
+            elif slot < len(self._vectors):
+                self._vectors[slot] = vector
+            else:
+                self._vectors.append(vector)
+            if slot < len(self._values):
+                self._values[slot] = value
+            else:
+                self._values.append(value)
+
+
+# Background event loop shared by every analysis in this process, and the pid that started it
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def run_coroutine(coro):
+    """
+    Run `coro` on the process's shared background event loop and return its result.
+    
+    The async OpenAI clients pool their connections on the loop they were first used on, so
+    analyzers shared across threads must always run on the same loop; asyncio.run would create
+    (and close) a new one each time. The loop is restarted after a fork, whose child lacks the thread.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="analyzer-event-loop", daemon=True).start()
+        loop = _loop
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+class RateLimiter:
+    """
+    Token bucket limiting requests per minute and estimated tokens per minute.
+    
+    Callers wait in acquire() before sending a request, instead of backing off after a 429.
+    Either limit may be None for no limit. Buckets refill continuously from a monotonic clock
+    under a lock, so one limiter can be shared across threads and event loops.
+    """
+    
+    def __init__(self, rpm: int = None, tpm: int = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls):
+        """Build a limiter from OPENAI_RPM / OPENAI_TPM, or return None if neither is set."""
+        rpm, tpm = os.getenv("OPENAI_RPM"), os.getenv("OPENAI_TPM")
+        if not rpm and not tpm:
+            return None
+        return cls(rpm=int(rpm) if rpm else None, tpm=int(tpm) if tpm else None)
+    
+    def _wait_time(self, tokens: int) -> float:
+        """Refill the buckets and take a request if both have room; otherwise return seconds to wait."""
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        wait = 0.0
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+            wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+            wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+        if wait <= 0:
+            self._requests -= 1
+            self._tokens -= tokens
+        return wait
+    
+    async def acquire(self, tokens: int = 0):
+        """Wait until a request of about `tokens` tokens can be sent within both limits."""
+        # A request larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        while True:
+            with self._lock:
+                wait = self._wait_time(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+# Sentence boundary for the regex splitter: whitespace after . ! or ? and before a capital letter
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+_WHITESPACE = re.compile(r'\s+')
+_STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+
+class NDJSONResultWriter:
+    """
+    Streams sentence results to an NDJSON file, one record per line, as they complete.
+    
+    Records carry the sentence's "index" because sentences may finish out of order. Running totals
+    are kept as records are written, and on close() a summary is written to a sidecar file
+    (foo.ndjson -> foo.summary.json). Read results back with `for line in f: orjson.loads(line)`.
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.summary_filename = str(Path(filename).with_suffix(".summary.json"))
+        self.total_sentences = 0
+        self.total_claims = 0
+        self.article_microlies = 0.0
+        self._file = open(filename, "wb")
+    
+    def write(self, index: int, analysis: SentenceAnalysis):
+        record = {"index": index, **sentence_record(analysis)}
+        self._file.write(_json_dumps(record) + b"\n")
+        self.total_sentences += 1
+        self.total_claims += len(analysis.claims)
+        self.article_microlies += analysis.sentence_microlies
+    
+    def close(self):
+        self._file.close()
+        summary = {
+            "article_microlies": self.article_microlies,
+            "total_sentences": self.total_sentences,
+            "total_claims": self.total_claims
+        }
+        with open(self.summary_filename, "wb") as f:
+            f.write(_json_dumps(summary, indent=True))
+        print(f"Results saved to {self.filename} (summary in {self.summary_filename})")
+        print(f"Article microlies total: {self.article_microlies:.6f}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def normalize_claim(text: str) -> str:
+    """Normalize a claim for deduplication: lowercase, punctuation removed, whitespace collapsed."""
+    return " ".join(text.lower().translate(_STRIP_PUNCTUATION).split())
+
+
+def _memo_key(*parts: str) -> bytes:
+    """SHA-256 digest of the given strings, NUL-separated, for exact-match memoization."""
+    return hashlib.sha256(b"\x00".join(part.encode("utf-8") for part in parts)).digest()
+
+
+def _interpretation_key(article_text: str, sentence: str, claim: str) -> bytes:
+    """Memo key for an interpretation probability, which depends on the text the prompt shows."""
+    return _memo_key(article_text, sentence, claim)
+
+
+def _truth_key(article_text: str, claim: str) -> bytes:
+    """Memo key for a truth probability: the normalized claim judged against the given text."""
+    return _memo_key(article_text, normalize_claim(claim))
+
+
+def _json_loads(data):
+    """Parse JSON from str or bytes, using orjson when installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+# OpenAI chat roles for LangChain message types, used when building Batch API requests
+_OPENAI_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
 
 
 class ArticleAnalyzer:
     """LangChain agent for analyzing articles and extracting claims."""
     
-    def __init__(self, model_name: str = "gpt-4o-mini"):
-        """Initialize the analyzer with a language model."""
+    # Maximum entries in each exact-match probability memo
+    MEMO_MAXSIZE = 10000
+    
+    # Capacity of each stage queue in the analysis pipeline
+    QUEUE_SIZE = 32
+    
+    def __init__(self, model_name: str = "gpt-4o-mini", extractor_model: str = "gpt-4o-mini", concurrency_limit: int = 20,
+                 semantic_cache_threshold: float = None, context_window: int = None,
+                 rate_limiter: RateLimiter = None, article_cache_dir: str = ".article_cache"):
+        """
+        Initialize the analyzer with a language model.
+        
+        model_name is used for the interpretation and truth scoring, where judgment matters;
+        claim extraction is a simpler listing task and uses the cheaper extractor_model.
+        concurrency_limit caps the number of LLM requests in flight at once.
+        If semantic_cache_threshold is set, probability results are reused for claims whose
+        embedding has at least that cosine similarity to one already scored (0.92 is a good start).
+        If context_window is set, probability prompts include only the sentences within that many
+        sentences of the claim's sentence instead of the full article.
+        rate_limiter throttles async LLM requests; by default it is built from the OPENAI_RPM and
+        OPENAI_TPM environment variables, and requests are unthrottled if neither is set.
+        Fetched articles are cached in article_cache_dir and revalidated with ETag / Last-Modified;
+        pass None to disable the cache.
+        """
         load_dotenv()
         if not os.getenv("OPENAI_API_KEY"):
             raise ValueError(
@@ -56,7 +414,33 @@ class ArticleAnalyzer:
                 "Create a .env file with: OPENAI_API_KEY=your-api-key-here"
             )
         
+        self.model_name = model_name
         self.llm = ChatOpenAI(model=model_name)
+        self.extractor_llm = ChatOpenAI(model=extractor_model, temperature=0)
+        
+        # Probability prompts return validated pydantic objects; include_raw keeps the token usage
+        self.probability_scorer = self.llm.with_structured_output(ProbabilityResponse, include_raw=True)
+        self.combined_scorer = self.llm.with_structured_output(CombinedProbabilityResponse, include_raw=True)
+        self.concurrency_limit = concurrency_limit
+        self.context_window = context_window
+        self.rate_limiter = rate_limiter or RateLimiter.from_env()
+        self.article_cache_dir = Path(article_cache_dir) if article_cache_dir else None
+        
+        # Cumulative prompt token usage; cached_tokens counts prompt-cache hits
+        self.usage = {"input_tokens": 0, "cached_tokens": 0}
+        
+        # Exact-match memos of probability results. Truth is keyed on (context, normalized claim) and
+        # interpretation on (context, sentence, claim), where the context is the article or window
+        # shown in the prompt, so an analyzer shared across requests never reuses another article's verdict.
+        self._truth_memo: dict[bytes, tuple[float, str]] = {}
+        self._interpretation_memo: dict[bytes, tuple[float, str]] = {}
+        
+        if semantic_cache_threshold is not None:
+            self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small", dimensions=256)
+            self.truth_cache = SemanticCache(semantic_cache_threshold)
+            self.interpretation_cache = SemanticCache(semantic_cache_threshold)
+        else:
+            self.embeddings = self.truth_cache = self.interpretation_cache = None
         
         self.setup_prompts()
     
@@ -73,7 +457,10 @@ class ArticleAnalyzer:
             ("human", "Sentence: {sentence}")
         ])
         
+        # The article comes first and is identical across calls, so OpenAI's automatic prompt
+        # caching can reuse it as a prefix; only the sentence and claim vary at the end.
         self.interpretation_probability_prompt = ChatPromptTemplate.from_messages([
+            ("system", "Full article text:\n{article_text}"),
             ("system", """You are an expert at understanding how people interpret text.
             Given a sentence from an article and a potential claim, estimate the probability (0-1) that someone would 
             interpret the author as making that claim.
@@ -91,10 +478,11 @@ class ArticleAnalyzer:
             }}
             
             The probability must be a decimal between 0 and 1."""),
-            ("human", "Full article text:\n{article_text}\n\nSpecific sentence: {sentence}\nPotential claim: {claim}")
+            ("human", "Specific sentence: {sentence}\nPotential claim: {claim}")
         ])
         
         self.truth_probability_prompt = ChatPromptTemplate.from_messages([
+            ("system", "Full article text:\n{article_text}"),
             ("system", """You are an expert at evaluating the truth of claims.
             Given a claim from an article, estimate the probability (0-1) that the claim is true.
             
@@ -112,63 +500,158 @@ class ArticleAnalyzer:
             }}
             
             The probability must be a decimal between 0 and 1."""),
-            ("human", "Full article text:\n{article_text}\n\nClaim to evaluate: {claim}")
+            ("human", "Claim to evaluate: {claim}")
+        ])
+        
+        # Scores interpretation and truth in one call; used when neither result is already known
+        self.combined_probability_prompt = ChatPromptTemplate.from_messages([
+            ("system", "Full article text:\n{article_text}"),
+            ("system", """You are an expert at understanding how people interpret text and at evaluating the truth of claims.
+            Given a sentence from an article and a potential claim, estimate two probabilities (0-1):
+            1. The probability that someone would interpret the author as making that claim.
+               Consider how directly the sentence states the claim, whether the claim requires inference,
+               how reasonable the interpretation is, and the context provided by the full article.
+            2. The probability that the claim is true.
+               Consider available evidence in the article, common knowledge, logical consistency,
+               uncertainty and ambiguity, and the context provided by the full article.
+            
+            Format your response as JSON with this structure:
+            {{
+                "interp_explanation": "Brief explanation of your interpretation reasoning",
+                "interp_prob": 0.75,
+                "truth_explanation": "Brief explanation of your truth reasoning",
+                "truth_prob": 0.75
+            }}
+            
+            Both probabilities must be decimals between 0 and 1."""),
+            ("human", "Specific sentence: {sentence}\nPotential claim: {claim}")
         ])
     
     def fetch_article(self, url: str) -> str:
-        """Fetch and extract text content from a URL."""
+        """
+        Fetch and extract text content from a URL.
+        
+        If the article is in the on-disk cache, the request is made conditional on its ETag /
+        Last-Modified, and a 304 response returns the cached text without re-extracting it.
+        """
         try:
             headers = {
                 'User-Agent': 'Ben your.email@example.com',  # Replace with your actual info
                 'Accept-Encoding': 'gzip, deflate',
                 'Host': requests.utils.urlparse(url).netloc
             }
+            cached = self._load_cached_article(url)
+            if cached is not None:
+                validators, cached_text = cached
+                if validators.get("etag"):
+                    headers['If-None-Match'] = validators["etag"]
+                if validators.get("last_modified"):
+                    headers['If-Modified-Since'] = validators["last_modified"]
+            
             response = requests.get(url, headers=headers)
+            if cached is not None and response.status_code == 304:
+                return cached_text
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Add spaces after block elements before extracting text
-            block_elements = ['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 
-                            'li', 'br', 'hr', 'blockquote', 'pre', 'section', 'article']
-            for tag_name in block_elements:
-                for tag in soup.find_all(tag_name):
-                    if tag.string:
-                        tag.string.replace_with(tag.string + ' ')
-                    elif tag.get_text():
-                        # Insert space after the tag
-                        if tag.next_sibling:
-                            tag.insert_after(' ')
-            
-            # Get text content
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            # Clean up multiple spaces
-            import re
-            text = re.sub(r'\s+', ' ', text).strip()
-            
+            text = self._extract_text(response.content)
+            self._store_cached_article(url, response, text)
             return text
             
         except Exception as e:
             raise Exception(f"Error fetching article from {url}: {str(e)}")
     
+    def _article_cache_paths(self, url: str) -> tuple[Path, Path]:
+        """Paths of the validator metadata and extracted text cached for `url`."""
+        stem = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.article_cache_dir / f"{stem}.json", self.article_cache_dir / f"{stem}.txt"
+    
+    def _load_cached_article(self, url: str):
+        """Return (validators, text) cached for `url`, or None if caching is off or nothing is cached."""
+        if self.article_cache_dir is None:
+            return None
+        meta_path, text_path = self._article_cache_paths(url)
+        try:
+            return _json_loads(meta_path.read_bytes()), text_path.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None
+    
+    def _store_cached_article(self, url: str, response, text: str):
+        """Cache extracted text for `url` if the response carries a validator to revalidate it with."""
+        if self.article_cache_dir is None:
+            return
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        if not any(validators.values()):
+            return
+        meta_path, text_path = self._article_cache_paths(url)
+        self.article_cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to temporary files and rename, so concurrent fetches never read a partial entry;
+        # the text is stored first so metadata never points at missing text
+        for path, data in ((text_path, text.encode("utf-8")), (meta_path, _json_dumps(validators))):
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+    
+    def _extract_text(self, content: bytes) -> str:
+        """Extract the main article text from fetched HTML."""
+        text = None
+        if trafilatura is not None:
+            text = trafilatura.extract(
+                content,
+                include_comments=False,
+                include_tables=False,
+                favor_precision=True
+            )
+        if not text:
+            return self._extract_text_bs4(content)
+        
+        return _WHITESPACE.sub(' ', text).strip()
+    
+    def _extract_text_bs4(self, content: bytes) -> str:
+        """Extract visible text from HTML with BeautifulSoup."""
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+        
+        # Add spaces after block elements before extracting text
+        block_elements = ['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 
+                        'li', 'br', 'hr', 'blockquote', 'pre', 'section', 'article']
+        for tag_name in block_elements:
+            for tag in soup.find_all(tag_name):
+                if tag.string:
+                    tag.string.replace_with(tag.string + ' ')
+                elif tag.get_text():
+                    # Insert space after the tag
+                    if tag.next_sibling:
+                        tag.insert_after(' ')
+        
+        # Get text content
+        text = soup.get_text()
+        
+        # Clean up whitespace
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        text = ' '.join(chunk for chunk in chunks if chunk)
+        
+        # Clean up multiple spaces
+        text = _WHITESPACE.sub(' ', text).strip()
+        
+        return text
+    
     def split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences."""
-        # Use regex to split on sentence endings, but be careful with abbreviations
-        sentence_endings = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
-        sentences = sentence_endings.split(text)
+        """Split text into sentences, using blingfire when it is installed."""
+        if blingfire is not None:
+            sentences = blingfire.text_to_sentences(text).split("\n")
+        else:
+            # Use regex to split on sentence endings, but be careful with abbreviations
+            sentences = _SENT_SPLIT.split(text)
         
         # Filter out very short sentences and clean whitespace
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        sentences = [s for s in map(str.strip, sentences) if len(s) > 10]
         
         return sentences
     
@@ -176,51 +659,104 @@ class ArticleAnalyzer:
         """Extract potential claims from a sentence."""
         try:
             prompt = self.claim_extraction_prompt.format_messages(sentence=sentence)
-            response = self.llm.invoke(prompt)
-            
-            # Parse JSON response
-            claims_text = response.content.strip()
-            if claims_text.startswith('```json'):
-                claims_text = claims_text[7:-3]
-            elif claims_text.startswith('```'):
-                claims_text = claims_text[3:-3]
-            
-            claims = json.loads(claims_text)
-            return claims
+            response = self._record_usage(self.extractor_llm.invoke(prompt))
+            return self._parse_claims_response(response.content)
             
         except Exception as e:
             print(f"Error extracting claims from sentence: {str(e)}")
             return []
     
+    async def extract_claims_async(self, sentence: str, semaphore: asyncio.Semaphore = None) -> List[str]:
+        """Async version of extract_claims."""
+        try:
+            return await self._extract_claims_or_raise(sentence, semaphore)
+        
+        except Exception as e:
+            print(f"Error extracting claims from sentence: {str(e)}")
+            return []
+    
+    async def _extract_claims_or_raise(self, sentence: str, semaphore: asyncio.Semaphore = None) -> List[str]:
+        """extract_claims_async without the error handling, for callers that record failures."""
+        prompt = self.claim_extraction_prompt.format_messages(sentence=sentence)
+        response = await self._ainvoke(prompt, semaphore, self.extractor_llm)
+        return self._parse_claims_response(response.content)
+    
+    def _parse_claims_response(self, response_text: str) -> List[str]:
+        """Parse the JSON list of claims returned by the claim extraction prompt."""
+        claims_text = response_text.strip()
+        if claims_text.startswith('```json'):
+            claims_text = claims_text[7:-3]
+        elif claims_text.startswith('```'):
+            claims_text = claims_text[3:-3]
+        
+        return _json_loads(claims_text)
+    
+    async def _ainvoke(self, messages, semaphore: asyncio.Semaphore = None, runnable=None):
+        """
+        Invoke the LLM (or `runnable`, e.g. a structured-output scorer) asynchronously,
+        holding `semaphore` (if given) for the duration of the call.
+        """
+        runnable = runnable or self.llm
+        if semaphore is None:
+            return await self._throttled_ainvoke(runnable, messages)
+        async with semaphore:
+            return await self._throttled_ainvoke(runnable, messages)
+    
+    async def _throttled_ainvoke(self, runnable, messages):
+        """Wait for the rate limiter, if any, then invoke `runnable` and record its usage."""
+        if self.rate_limiter is not None:
+            # Roughly four characters per token for English text
+            await self.rate_limiter.acquire(sum(len(m.content) for m in messages) // 4)
+        return self._record_usage(await runnable.ainvoke(messages))
+    
+    def _record_usage(self, response):
+        """Add a response's prompt token counts to self.usage; returns the response."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            self.usage["input_tokens"] += usage.get("input_tokens", 0)
+            self.usage["cached_tokens"] += (usage.get("input_token_details") or {}).get("cache_read", 0)
+        return response
+    
+    def _parse_structured(self, output) -> tuple:
+        """Unwrap an include_raw structured-output result into a tuple; raises if parsing failed."""
+        self._record_usage(output["raw"])
+        if output["parsed"] is None:
+            raise ValueError(f"Unparseable response: {output['parsing_error']}")
+        return output["parsed"].as_tuple()
+    
     def calculate_interpretation_probability(self, sentence: str, claim: str, article_text: str) -> tuple[float, str]:
         """Calculate probability someone would interpret the author as making this claim."""
+        memo_key = _interpretation_key(article_text, sentence, claim)
+        cached = self._interpretation_memo.get(memo_key)
+        if cached is not None:
+            return cached
+        
         try:
             prompt_messages = self.interpretation_probability_prompt.format_messages(
                 article_text=article_text, sentence=sentence, claim=claim
             )
             
-            response = self.llm.invoke(prompt_messages)
-            response_text = response.content.strip()
-            
-            return self._parse_probability_response(response_text)
+            result = self._parse_structured(self.probability_scorer.invoke(prompt_messages))
+            return self._remember(self._interpretation_memo, memo_key, result)
             
         except Exception as e:
             print(f"Error calculating interpretation probability: {str(e)}")
             return 0.5, f"Error: {str(e)}"
     
-    async def calculate_interpretation_probability_async(self, sentence: str, claim: str, article_text: str) -> tuple[float, str]:
+    async def calculate_interpretation_probability_async(self, sentence: str, claim: str, article_text: str, semaphore: asyncio.Semaphore = None) -> tuple[float, str]:
         """Async version of calculate_interpretation_probability."""
+        memo_key = _interpretation_key(article_text, sentence, claim)
+        cached = self._interpretation_memo.get(memo_key)
+        if cached is not None:
+            return cached
+        
         try:
             prompt_messages = self.interpretation_probability_prompt.format_messages(
                 article_text=article_text, sentence=sentence, claim=claim
             )
             
-            # Run the synchronous LLM call in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self.llm.invoke, prompt_messages)
-            response_text = response.content.strip()
-            
-            return self._parse_probability_response(response_text)
+            result = self._parse_structured(await self._ainvoke(prompt_messages, semaphore, self.probability_scorer))
+            return self._remember(self._interpretation_memo, memo_key, result)
             
         except Exception as e:
             print(f"Error calculating interpretation probability: {str(e)}")
@@ -228,119 +764,319 @@ class ArticleAnalyzer:
     
     def calculate_truth_probability(self, claim: str, article_text: str) -> tuple[float, str]:
         """Calculate probability that the claim is true."""
+        memo_key = _truth_key(article_text, claim)
+        cached = self._truth_memo.get(memo_key)
+        if cached is not None:
+            return cached
+        
         try:
             prompt_messages = self.truth_probability_prompt.format_messages(
                 article_text=article_text, claim=claim
             )
-            response = self.llm.invoke(prompt_messages)
-            response_text = response.content.strip()
-            
-            return self._parse_probability_response(response_text)
+            result = self._parse_structured(self.probability_scorer.invoke(prompt_messages))
+            return self._remember(self._truth_memo, memo_key, result)
             
         except Exception as e:
             print(f"Error calculating truth probability: {str(e)}")
             return 0.5, f"Error: {str(e)}"
     
-    async def calculate_truth_probability_async(self, claim: str, article_text: str) -> tuple[float, str]:
+    async def calculate_truth_probability_async(self, claim: str, article_text: str, semaphore: asyncio.Semaphore = None) -> tuple[float, str]:
         """Async version of calculate_truth_probability."""
+        memo_key = _truth_key(article_text, claim)
+        cached = self._truth_memo.get(memo_key)
+        if cached is not None:
+            return cached
+        
         try:
             prompt_messages = self.truth_probability_prompt.format_messages(
                 article_text=article_text, claim=claim
             )
             
-            # Run the synchronous LLM call in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self.llm.invoke, prompt_messages)
-            response_text = response.content.strip()
-            
-            return self._parse_probability_response(response_text)
+            result = self._parse_structured(await self._ainvoke(prompt_messages, semaphore, self.probability_scorer))
+            return self._remember(self._truth_memo, memo_key, result)
             
         except Exception as e:
             print(f"Error calculating truth probability: {str(e)}")
             return 0.5, f"Error: {str(e)}"
     
-    def _parse_probability_response(self, response_text: str) -> tuple[float, str]:
-        """Parse probability and explanation from LLM response."""
+    def score_claim(self, sentence: str, claim: str, article_text: str) -> tuple[float, str, float, str]:
+        """
+        Calculate both the interpretation and truth probabilities of a claim in a single LLM call.
+        
+        Returns (prob_interpreted, interpretation_explanation, prob_true, truth_explanation).
+        Results already in the exact-match memos are reused, falling back to the single-probability
+        prompt when only one of the two is missing.
+        """
+        interp_key, truth_key = _interpretation_key(article_text, sentence, claim), _truth_key(article_text, claim)
+        interp, truth = self._interpretation_memo.get(interp_key), self._truth_memo.get(truth_key)
+        if interp is not None or truth is not None:
+            interp = interp or self.calculate_interpretation_probability(sentence, claim, article_text)
+            truth = truth or self.calculate_truth_probability(claim, article_text)
+            return (*interp, *truth)
+        
         try:
-            # Clean up potential markdown formatting
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-                if cleaned_text.endswith('```'):
-                    cleaned_text = cleaned_text[:-3]
-            elif cleaned_text.startswith('```'):
-                cleaned_text = cleaned_text[3:]
-                if cleaned_text.endswith('```'):
-                    cleaned_text = cleaned_text[:-3]
+            prompt_messages = self.combined_probability_prompt.format_messages(
+                article_text=article_text, sentence=sentence, claim=claim
+            )
+            result = self._parse_structured(self.combined_scorer.invoke(prompt_messages))
+            return self._remember_combined(interp_key, truth_key, result)
             
-            cleaned_text = cleaned_text.strip()
+        except Exception as e:
+            print(f"Error scoring claim: {str(e)}")
+            return 0.5, f"Error: {str(e)}", 0.5, f"Error: {str(e)}"
+    
+    async def score_claim_async(self, sentence: str, claim: str, article_text: str,
+                                semaphore: asyncio.Semaphore = None) -> tuple[float, str, float, str]:
+        """Async version of score_claim."""
+        interp_key, truth_key = _interpretation_key(article_text, sentence, claim), _truth_key(article_text, claim)
+        interp, truth = self._interpretation_memo.get(interp_key), self._truth_memo.get(truth_key)
+        if interp is not None or truth is not None:
+            interp = interp or await self.calculate_interpretation_probability_async(sentence, claim, article_text, semaphore)
+            truth = truth or await self.calculate_truth_probability_async(claim, article_text, semaphore)
+            return (*interp, *truth)
+        
+        try:
+            prompt_messages = self.combined_probability_prompt.format_messages(
+                article_text=article_text, sentence=sentence, claim=claim
+            )
+            result = self._parse_structured(await self._ainvoke(prompt_messages, semaphore, self.combined_scorer))
+            return self._remember_combined(interp_key, truth_key, result)
             
-            # Try to find JSON object in the text
-            import re
-            json_match = re.search(r'\{[^{}]*"explanation"[^{}]*"probability"[^{}]*\}', cleaned_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                result = json.loads(json_str)
-                prob = float(result.get("probability", 0.5))
-                explanation = result.get("explanation", "No explanation provided")
-                return max(0.0, min(1.0, prob)), explanation
+        except Exception as e:
+            print(f"Error scoring claim: {str(e)}")
+            return 0.5, f"Error: {str(e)}", 0.5, f"Error: {str(e)}"
+    
+    def _remember_combined(self, interp_key: bytes, truth_key: bytes,
+                           result: tuple[float, str, float, str]) -> tuple[float, str, float, str]:
+        """Store a combined score in both memos; returns the result."""
+        self._remember(self._interpretation_memo, interp_key, result[:2])
+        self._remember(self._truth_memo, truth_key, result[2:])
+        return result
+    
+    def _remember(self, memo: dict, key: bytes, result: tuple[float, str]) -> tuple[float, str]:
+        """Store a probability result in `memo`, evicting the oldest entry when full; returns the result."""
+        memo[key] = result
+        if len(memo) > self.MEMO_MAXSIZE:
+            memo.pop(next(iter(memo)), None)
+        return result
+    
+    async def _embed_claims(self, sentence: str, claim_texts: List[str], semaphore: asyncio.Semaphore = None):
+        """
+        Embed a sentence's claims for the semantic caches in a single request.
+        
+        Returns (truth_vectors, interpretation_vectors); both are lists of None when the
+        semantic cache is disabled or embedding fails.
+        """
+        no_vectors = [None] * len(claim_texts)
+        if self.embeddings is None or not claim_texts:
+            return no_vectors, no_vectors
+        texts = claim_texts + [f"{sentence}\n{claim}" for claim in claim_texts]
+        try:
+            if semaphore is None:
+                vectors = await self.embeddings.aembed_documents(texts)
             else:
-                # Try parsing the whole cleaned text
-                result = json.loads(cleaned_text)
-                prob = float(result.get("probability", 0.5))
-                explanation = result.get("explanation", "No explanation provided")
-                return max(0.0, min(1.0, prob)), explanation
-            
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"  DEBUG - JSON parse error: {e}")
-            print(f"  DEBUG - Response text: '{response_text}'")
-            
-            # Fallback: try to extract number from text
-            import re
-            numbers = re.findall(r'0?\.\d+|[01]\.?\d*', response_text)
-            if numbers:
-                prob = float(numbers[0])
-                return max(0.0, min(1.0, prob)), f"Fallback parse: {response_text}"
+                async with semaphore:
+                    vectors = await self.embeddings.aembed_documents(texts)
+        except Exception as e:
+            print(f"Error embedding claims, skipping semantic cache: {str(e)}")
+            return no_vectors, no_vectors
+        return vectors[:len(claim_texts)], vectors[len(claim_texts):]
+    
+    def _semantic_lookup(self, cache: SemanticCache, vector):
+        """Return the cached result for `vector`, or None on a miss or when caching is disabled."""
+        if cache is None or vector is None:
+            return None
+        return cache.lookup(vector)
+    
+    def _semantic_add(self, cache: SemanticCache, vector, result: tuple[float, str]):
+        """Add a successful result to the semantic cache, if caching is enabled."""
+        if cache is not None and vector is not None and not result[1].startswith("Error:"):
+            cache.add(vector, result)
+    
+    async def _cached(self, cache: SemanticCache, vector, compute) -> tuple[float, str]:
+        """Return a cached result for `vector` if there is one, else await compute() and cache it."""
+        hit = self._semantic_lookup(cache, vector)
+        if hit is not None:
+            return hit
+        result = await compute()
+        self._semantic_add(cache, vector, result)
+        return result
+    
+    async def _score_claim(self, sentence: str, claim_text: str, article_text: str,
+                           truth_vector, interp_vector, semaphore: asyncio.Semaphore = None,
+                           truth_pending: dict = None) -> Claim:
+        """
+        Score a single claim.
+        
+        Both probabilities come from one combined LLM call unless the semantic caches already hold
+        one of them, in which case only the missing probability is calculated.
+        
+        truth_pending, shared by concurrent calls, maps truth memo keys to futures of their truth
+        results, so a claim repeated across sentences (with the same context) while the first is
+        still being scored waits for that truth result instead of requesting it again.
+        """
+        interp = self._semantic_lookup(self.interpretation_cache, interp_vector)
+        truth = self._semantic_lookup(self.truth_cache, truth_vector)
+        
+        owned = None
+        if truth is None and truth_pending is not None:
+            key = _truth_key(article_text, claim_text)
+            if key in truth_pending:
+                # None means the first scoring failed, so calculate it here after all
+                truth = await truth_pending[key]
             else:
-                return 0.5, f"Parse failed: {response_text}"
+                owned = truth_pending[key] = asyncio.get_running_loop().create_future()
+        
+        try:
+            if interp is None and truth is None:
+                scores = await self.score_claim_async(sentence, claim_text, article_text, semaphore)
+                interp, truth = scores[:2], scores[2:]
+                self._semantic_add(self.interpretation_cache, interp_vector, interp)
+                self._semantic_add(self.truth_cache, truth_vector, truth)
+            elif interp is None:
+                interp = await self._cached(
+                    self.interpretation_cache, interp_vector,
+                    lambda: self.calculate_interpretation_probability_async(sentence, claim_text, article_text, semaphore)
+                )
+            elif truth is None:
+                truth = await self._cached(
+                    self.truth_cache, truth_vector,
+                    lambda: self.calculate_truth_probability_async(claim_text, article_text, semaphore)
+                )
+        finally:
+            if owned is not None:
+                owned.set_result(truth if truth is not None and not truth[1].startswith("Error:") else None)
+        
+        return build_claim(claim_text, *interp, *truth)
     
-    async def analyze_claims_parallel(self, sentence: str, claim_texts: List[str], article_text: str) -> List[Claim]:
+    async def analyze_claims_parallel(self, sentence: str, claim_texts: List[str], article_text: str,
+                                      semaphore: asyncio.Semaphore = None) -> List[Claim]:
         """Analyze all claims for a sentence in parallel."""
-        async def analyze_single_claim(claim_text: str) -> Claim:
-            # Run both probability calculations concurrently
-            interp_task = self.calculate_interpretation_probability_async(sentence, claim_text, article_text)
-            truth_task = self.calculate_truth_probability_async(claim_text, article_text)
-            
-            # Wait for both to complete
-            (prob_interpreted, interp_explanation), (prob_true, truth_explanation) = await asyncio.gather(
-                interp_task, truth_task
-            )
-            
-            # Calculate microlies: (p(claim made) * p(claim false))^3
-            prob_false = 1.0 - prob_true
-            microlies = (prob_interpreted * prob_false) ** 3 * 1000000
-            
-            return Claim(
-                text=claim_text,
-                probability_interpreted=prob_interpreted,
-                probability_true=prob_true,
-                interpretation_explanation=interp_explanation,
-                truth_explanation=truth_explanation,
-                microlies=microlies
-            )
+        truth_vectors, interp_vectors = await self._embed_claims(sentence, claim_texts, semaphore)
         
         # Process all claims in parallel
-        claim_tasks = [analyze_single_claim(claim_text) for claim_text in claim_texts]
+        truth_pending = {}
+        claim_tasks = [
+            self._score_claim(sentence, claim_text, article_text, truth_vector, interp_vector, semaphore, truth_pending)
+            for claim_text, truth_vector, interp_vector in zip(claim_texts, truth_vectors, interp_vectors)
+        ]
         claims = await asyncio.gather(*claim_tasks)
         
         return claims
     
-    def analyze_text(self, text: str, max_sentences: int = None, max_claims: int = None, skip_sentences: int = 0) -> List[SentenceAnalysis]:
-        """Analyze text directly without fetching from URL."""
-        print("Analyzing provided text...")
-        article_text = text
+    async def analyze_sentences_async(self, sentences: List[str], article_text: str, max_claims: int = None,
+                                      on_sentence: Callable[[int, SentenceAnalysis], None] = None,
+                                      contexts: List[str] = None) -> List[SentenceAnalysis]:
+        """
+        Analyze all sentences through a bounded producer/consumer pipeline.
         
-        print("Splitting text into sentences...")
+        Sentences flow through sentence_q to extractor workers, which push each claim onto
+        claim_q; scorer workers push scored claims onto scored_q, where a collector reassembles
+        them per sentence. Every queue holds at most QUEUE_SIZE items, so scoring starts as soon
+        as the first claims are extracted, and at most concurrency_limit LLM requests are in flight.
+        
+        on_sentence(index, analysis) is called as each sentence completes (not necessarily in
+        order), allowing callers to stream results. If contexts is given, contexts[i] replaces
+        article_text in the probability prompts for sentences[i]. Results are returned in sentence order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency_limit)
+        sentence_q = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        claim_q = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        scored_q = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        results = [None] * len(sentences)
+        pending = {}  # sentence index -> (claim slots, number of claims still being scored)
+        truth_pending = {}  # truth memo key -> future of its truth result, shared across sentences
+        errors = []
+        
+        def finish(index: int, claims: List[Claim], extraction_failed: bool = False):
+            analysis = SentenceAnalysis(
+                sentence=sentences[index],
+                claims=claims,
+                sentence_microlies=sum(claim.microlies for claim in claims),
+                extraction_failed=extraction_failed
+            )
+            results[index] = analysis
+            if on_sentence:
+                on_sentence(index, analysis)
+        
+        async def extractor():
+            while True:
+                index, sentence = await sentence_q.get()
+                try:
+                    try:
+                        claim_texts = await self._extract_claims_or_raise(sentence, semaphore)
+                    except Exception as e:
+                        print(f"Error extracting claims from sentence: {str(e)}")
+                        finish(index, [], extraction_failed=True)
+                        continue
+                    
+                    # Limit claims if specified
+                    if max_claims:
+                        claim_texts = claim_texts[:max_claims]
+                    
+                    if not claim_texts:
+                        finish(index, [])
+                        continue
+                    
+                    truth_vectors, interp_vectors = await self._embed_claims(sentence, claim_texts, semaphore)
+                    pending[index] = ([None] * len(claim_texts), len(claim_texts))
+                    for slot, item in enumerate(zip(claim_texts, truth_vectors, interp_vectors)):
+                        await claim_q.put((index, slot, *item))
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    sentence_q.task_done()
+        
+        async def scorer():
+            while True:
+                index, slot, claim_text, truth_vector, interp_vector = await claim_q.get()
+                try:
+                    context = contexts[index] if contexts else article_text
+                    claim = await self._score_claim(
+                        sentences[index], claim_text, context, truth_vector, interp_vector, semaphore, truth_pending
+                    )
+                    await scored_q.put((index, slot, claim))
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    claim_q.task_done()
+        
+        async def collector():
+            while True:
+                index, slot, claim = await scored_q.get()
+                try:
+                    claims, remaining = pending[index]
+                    claims[slot] = claim
+                    if remaining == 1:
+                        del pending[index]
+                        finish(index, claims)
+                    else:
+                        pending[index] = (claims, remaining - 1)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    scored_q.task_done()
+        
+        workers = [asyncio.create_task(extractor()) for _ in range(self.concurrency_limit)]
+        workers += [asyncio.create_task(scorer()) for _ in range(self.concurrency_limit)]
+        workers.append(asyncio.create_task(collector()))
+        try:
+            for item in enumerate(sentences):
+                await sentence_q.put(item)
+            await sentence_q.join()
+            await claim_q.join()
+            await scored_q.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        if errors:
+            raise errors[0]
+        return results
+    
+    def _select_sentences(self, article_text: str, max_sentences: int = None, skip_sentences: int = 0) -> List[str]:
+        """Split article text into sentences and apply the skip/limit options."""
         sentences = self.split_into_sentences(article_text)
         
         # Skip sentences if specified
@@ -354,136 +1090,226 @@ class ArticleAnalyzer:
             print(f"Limiting to first {max_sentences} sentences")
         
         print(f"Found {len(sentences)} sentences to analyze")
-        
-        results = []
-        
-        for i, sentence in enumerate(sentences):
-            print(f"\nAnalyzing sentence {i+1}/{len(sentences)}")
-            print(f"Sentence: {sentence[:100]}...")
-            
-            # Extract claims from sentence
-            claim_texts = self.extract_claims(sentence)
-            
-            # Limit claims if specified
-            if max_claims:
-                claim_texts = claim_texts[:max_claims]
-                print(f"Found {len(claim_texts)} potential claims (limited to {max_claims})")
-            else:
-                print(f"Found {len(claim_texts)} potential claims")
-            
-            # Use parallel processing for claims analysis
-            if claim_texts:
-                print(f"  Analyzing {len(claim_texts)} claims in parallel...")
-                claims = asyncio.run(self.analyze_claims_parallel(sentence, claim_texts, article_text))
-                
-                # Print results for each claim
-                for claim in claims:
-                    print(f"  Claim: {claim.text}")
-                    print(f"    P(interpreted): {claim.probability_interpreted:.3f}")
-                    print(f"    P(true): {claim.probability_true:.3f}")
-                    print(f"    Microlies: {claim.microlies:.6f}")
-            else:
-                claims = []
-            
-            # Calculate sentence-level microlies (sum of all claim microlies)
-            sentence_microlies = sum(claim.microlies for claim in claims)
+        return sentences
+    
+    def _sentence_contexts(self, article_text: str, skip_sentences: int, count: int) -> List[str]:
+        """
+        Return the probability-prompt context for each of the `count` sentences selected after
+        skipping skip_sentences: the sentence and its context_window neighbours on either side.
+        Returns None when context_window is unset, meaning the full article is used.
+        """
+        if self.context_window is None:
+            return None
+        all_sentences = self.split_into_sentences(article_text)
+        window = self.context_window
+        return [
+            " ".join(all_sentences[max(0, i - window):i + window + 1])
+            for i in range(skip_sentences, skip_sentences + count)
+        ]
+    
+    def _print_results(self, results: List[SentenceAnalysis]):
+        """Print the per-sentence, per-claim analysis report."""
+        for i, analysis in enumerate(results):
+            print(f"\nSentence {i+1}/{len(results)}: {analysis.sentence[:100]}...")
+            print(f"Found {len(analysis.claims)} potential claims")
             
-            analysis = SentenceAnalysis(
-                sentence=sentence, 
-                claims=claims,
-                sentence_microlies=sentence_microlies
-            )
-            results.append(analysis)
+            # Print results for each claim
+            for claim in analysis.claims:
+                print(f"  Claim: {claim.text}")
+                print(f"    P(interpreted): {claim.probability_interpreted:.3f}")
+                print(f"    P(true): {claim.probability_true:.3f}")
+                print(f"    Microlies: {claim.microlies:.6f}")
             
-            print(f"  Sentence microlies total: {sentence_microlies:.6f}")
-        
+            print(f"  Sentence microlies total: {analysis.sentence_microlies:.6f}")
+    
+    def _analyze(self, article_text: str, max_sentences: int = None, max_claims: int = None, skip_sentences: int = 0,
+                 output_file: str = None) -> List[SentenceAnalysis]:
+        """Split article text into sentences and analyze them, streaming results to output_file if given."""
+        sentences = self._select_sentences(article_text, max_sentences, skip_sentences)
+        contexts = self._sentence_contexts(article_text, skip_sentences, len(sentences))
+        input_tokens, cached_tokens = self.usage["input_tokens"], self.usage["cached_tokens"]
+        if output_file:
+            with NDJSONResultWriter(output_file) as writer:
+                results = run_coroutine(self.analyze_sentences_async(
+                    sentences, article_text, max_claims, on_sentence=writer.write, contexts=contexts
+                ))
+        else:
+            results = run_coroutine(self.analyze_sentences_async(sentences, article_text, max_claims, contexts=contexts))
+        self._print_results(results)
+        print(f"\nPrompt tokens: {self.usage['input_tokens'] - input_tokens} "
+              f"({self.usage['cached_tokens'] - cached_tokens} served from the prompt cache)")
         return results
     
-    def analyze_article(self, url: str, max_sentences: int = None, max_claims: int = None, skip_sentences: int = 0) -> List[SentenceAnalysis]:
-        """Analyze an entire article from URL."""
+    def analyze_text(self, text: str, max_sentences: int = None, max_claims: int = None, skip_sentences: int = 0,
+                     output_file: str = None) -> List[SentenceAnalysis]:
+        """Analyze text directly without fetching from URL, streaming NDJSON results to output_file if given."""
+        print("Analyzing provided text...")
+        print("Splitting text into sentences...")
+        return self._analyze(text, max_sentences=max_sentences, max_claims=max_claims, skip_sentences=skip_sentences,
+                             output_file=output_file)
+    
+    def analyze_article(self, url: str, max_sentences: int = None, max_claims: int = None, skip_sentences: int = 0,
+                        output_file: str = None) -> List[SentenceAnalysis]:
+        """Analyze an entire article from URL, streaming NDJSON results to output_file if given."""
         print(f"Fetching article from: {url}")
         article_text = self.fetch_article(url)
         
         print("Splitting article into sentences...")
-        sentences = self.split_into_sentences(article_text)
+        return self._analyze(article_text, max_sentences=max_sentences, max_claims=max_claims, skip_sentences=skip_sentences,
+                             output_file=output_file)
+    
+    def _build_batch_request(self, custom_id: str, messages) -> dict:
+        """Build one line of an OpenAI Batch API input file for a chat completion."""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model_name,
+                "messages": [{"role": _OPENAI_ROLES[m.type], "content": m.content} for m in messages],
+                "response_format": {"type": "json_object"}
+            }
+        }
+    
+    def _run_batch(self, batch_requests: List[dict], poll_interval: float) -> dict:
+        """
+        Submit chat completion requests as one OpenAI batch job and wait for it to finish.
         
-        # Skip sentences if specified
-        if skip_sentences > 0:
-            sentences = sentences[skip_sentences:]
-            print(f"Skipping first {skip_sentences} sentences")
+        Returns a dict mapping each custom_id to its response content.
+        Requests that failed or are missing from the output are left out.
+        """
+        client = OpenAI()
+        jsonl = b"".join(_json_dumps(r) + b"\n" for r in batch_requests)
+        input_file = client.files.create(file=("batch.jsonl", jsonl), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"Submitted batch {batch.id} with {len(batch_requests)} requests")
         
-        # Limit sentences if specified
-        if max_sentences:
-            sentences = sentences[:max_sentences]
-            print(f"Limiting to first {max_sentences} sentences")
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            progress = f" ({counts.completed}/{counts.total})" if counts else ""
+            print(f"  Batch {batch.id}: {batch.status}{progress}")
         
-        print(f"Found {len(sentences)} sentences to analyze")
+        if batch.status in ("failed", "cancelled"):
+            raise Exception(f"Batch {batch.id} {batch.status}")
         
-        results = []
+        # Expired batches still return the requests that completed in time
+        contents = {}
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                record = _json_loads(line)
+                body = (record.get("response") or {}).get("body") or {}
+                if record.get("error") or not body.get("choices"):
+                    continue
+                contents[record["custom_id"]] = body["choices"][0]["message"]["content"]
+        return contents
+    
+    async def _extract_all_claims_async(self, sentences: List[str], max_claims: int = None) -> List[List[str]]:
+        """Extract the claims for every sentence concurrently."""
+        semaphore = asyncio.Semaphore(self.concurrency_limit)
+        sentence_claims = await asyncio.gather(*(self.extract_claims_async(s, semaphore) for s in sentences))
+        return [claims[:max_claims] if max_claims else claims for claims in sentence_claims]
+    
+    def analyze_text_batch(self, text: str, max_sentences: int = None, max_claims: int = None,
+                           skip_sentences: int = 0, poll_interval: float = 30.0,
+                           output_file: str = None) -> List[SentenceAnalysis]:
+        """
+        Analyze text, scoring claims through the OpenAI Batch API.
         
-        for i, sentence in enumerate(sentences):
-            print(f"\nAnalyzing sentence {i+1}/{len(sentences)}")
-            print(f"Sentence: {sentence[:100]}...")
-            
-            # Extract claims from sentence
-            claim_texts = self.extract_claims(sentence)
-            
-            # Limit claims if specified
-            if max_claims:
-                claim_texts = claim_texts[:max_claims]
-                print(f"Found {len(claim_texts)} potential claims (limited to {max_claims})")
-            else:
-                print(f"Found {len(claim_texts)} potential claims")
-            
-            # Use parallel processing for claims analysis
-            if claim_texts:
-                print(f"  Analyzing {len(claim_texts)} claims in parallel...")
-                claims = asyncio.run(self.analyze_claims_parallel(sentence, claim_texts, article_text))
-                
-                # Print results for each claim
-                for claim in claims:
-                    print(f"  Claim: {claim.text}")
-                    print(f"    P(interpreted): {claim.probability_interpreted:.3f}")
-                    print(f"    P(true): {claim.probability_true:.3f}")
-                    print(f"    Microlies: {claim.microlies:.6f}")
-            else:
-                claims = []
-            
-            # Calculate sentence-level microlies (sum of all claim microlies)
-            sentence_microlies = sum(claim.microlies for claim in claims)
-            
-            analysis = SentenceAnalysis(
-                sentence=sentence, 
+        Claims are extracted with ordinary requests; a combined interpretation and truth prompt for
+        every distinct claim, plus an interpretation prompt for each repeat of a claim (whose truth is
+        sentence-independent), is then submitted as a single batch job, which costs half as much as synchronous requests but may
+        take up to 24 hours. Blocks, polling every poll_interval seconds, until the batch finishes.
+        Use analyze_text for interactive work. Results are written as NDJSON to output_file if given.
+        """
+        sentences = self._select_sentences(text, max_sentences, skip_sentences)
+        contexts = self._sentence_contexts(text, skip_sentences, len(sentences)) or [text] * len(sentences)
+        sentence_claims = run_coroutine(self._extract_all_claims_async(sentences, max_claims))
+        
+        batch_requests = []
+        truth_ids = {}  # truth memo key -> custom_id of the combined request scoring its truth
+        for i, (sentence, claim_texts, context) in enumerate(zip(sentences, sentence_claims, contexts)):
+            for j, claim in enumerate(claim_texts):
+                key = _truth_key(context, claim)
+                if key not in truth_ids:
+                    truth_ids[key] = f"claim::{i}::{j}"
+                    batch_requests.append(self._build_batch_request(
+                        f"claim::{i}::{j}",
+                        self.combined_probability_prompt.format_messages(article_text=context, sentence=sentence, claim=claim)
+                    ))
+                else:
+                    batch_requests.append(self._build_batch_request(
+                        f"interp::{i}::{j}",
+                        self.interpretation_probability_prompt.format_messages(article_text=context, sentence=sentence, claim=claim)
+                    ))
+        
+        responses = self._run_batch(batch_requests, poll_interval) if batch_requests else {}
+        scores = {}
+        for custom_id, content in responses.items():
+            combined = custom_id.startswith("claim::")
+            try:
+                model = CombinedProbabilityResponse if combined else ProbabilityResponse
+                scores[custom_id] = model.model_validate_json(content).as_tuple()
+            except ValueError as e:
+                scores[custom_id] = (0.5, f"Error: {str(e)}") * (2 if combined else 1)
+        missing = (0.5, "Error: no result in batch output")
+        
+        claim_scores = []
+        for i, (claim_texts, context) in enumerate(zip(sentence_claims, contexts)):
+            sentence_scores = []
+            for j, claim in enumerate(claim_texts):
+                truth_id = truth_ids[_truth_key(context, claim)]
+                combined_scores = scores.get(truth_id, missing * 2)
+                if truth_id == f"claim::{i}::{j}":
+                    sentence_scores.append(combined_scores)
+                else:
+                    sentence_scores.append(scores.get(f"interp::{i}::{j}", missing) + combined_scores[2:])
+            claim_scores.append(sentence_scores)
+        
+        # Every claim is scored by now, so compute the article's microlies in one pass
+        flat_scores = [score for sentence_scores in claim_scores for score in sentence_scores]
+        microlies = iter(compute_microlies([score[0] for score in flat_scores], [score[2] for score in flat_scores]))
+        
+        results = []
+        for sentence, claim_texts, sentence_scores in zip(sentences, sentence_claims, claim_scores):
+            claims = [
+                build_claim(claim, *score, microlies=next(microlies))
+                for claim, score in zip(claim_texts, sentence_scores)
+            ]
+            results.append(SentenceAnalysis(
+                sentence=sentence,
                 claims=claims,
-                sentence_microlies=sentence_microlies
-            )
-            results.append(analysis)
-            
-            print(f"  Sentence microlies total: {sentence_microlies:.6f}")
+                sentence_microlies=sum(claim.microlies for claim in claims)
+            ))
         
+        if output_file:
+            with NDJSONResultWriter(output_file) as writer:
+                for i, analysis in enumerate(results):
+                    writer.write(i, analysis)
+        
+        self._print_results(results)
         return results
     
+    def analyze_article_batch(self, url: str, max_sentences: int = None, max_claims: int = None,
+                              skip_sentences: int = 0, poll_interval: float = 30.0,
+                              output_file: str = None) -> List[SentenceAnalysis]:
+        """Analyze an article from URL, scoring claims through the OpenAI Batch API."""
+        print(f"Fetching article from: {url}")
+        article_text = self.fetch_article(url)
+        
+        print("Splitting article into sentences...")
+        return self.analyze_text_batch(article_text, max_sentences=max_sentences, max_claims=max_claims,
+                                       skip_sentences=skip_sentences, poll_interval=poll_interval,
+                                       output_file=output_file)
+    
     def save_results(self, results: List[SentenceAnalysis], filename: str):
         """Save analysis results to a JSON file."""
-        sentences_data = []
-        
-        for analysis in results:
-            sentence_data = {
-                "sentence": analysis.sentence,
-                "sentence_microlies": analysis.sentence_microlies,
-                "claims": [
-                    {
-                        "text": claim.text,
-                        "probability_interpreted": claim.probability_interpreted,
-                        "probability_true": claim.probability_true,
-                        "interpretation_explanation": claim.interpretation_explanation,
-                        "truth_explanation": claim.truth_explanation,
-                        "microlies": claim.microlies
-                    }
-                    for claim in analysis.claims
-                ]
-            }
-            sentences_data.append(sentence_data)
+        sentences_data = [sentence_record(analysis) for analysis in results]
         
         # Calculate article-level microlies (sum of all sentence microlies)
         article_microlies = sum(analysis.sentence_microlies for analysis in results)
@@ -495,8 +1321,8 @@ class ArticleAnalyzer:
             "sentences": sentences_data
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        with open(filename, 'wb') as f:
+            f.write(_json_dumps(output_data, indent=True))
         
         print(f"Results saved to {filename}")
         print(f"Article microlies total: {article_microlies:.6f}")
@@ -512,20 +1338,27 @@ def main():
     parser.add_argument("--sentences", type=int, help="Limit number of sentences to analyze")
     parser.add_argument("--claims", type=int, help="Limit number of claims to analyze per sentence")
     parser.add_argument("--skip", type=int, default=0, help="Skip the first N sentences")
+    parser.add_argument("--batch", action="store_true",
+                        help="Score claims through the OpenAI Batch API (half price, may take up to 24h)")
+    parser.add_argument("--extractor-model", default="gpt-4o-mini",
+                        help="Model used to extract claims from sentences (scoring uses the default model)")
+    parser.add_argument("--context-window", type=int,
+                        help="Give probability prompts only the N sentences either side of each sentence, not the full article")
     
     args = parser.parse_args()
     
     # Create output directory
     os.makedirs("analysis_log", exist_ok=True)
     
-    analyzer = ArticleAnalyzer()
-    results = analyzer.analyze_article(args.url, max_sentences=args.sentences, max_claims=args.claims, skip_sentences=args.skip)
+    analyzer = ArticleAnalyzer(extractor_model=args.extractor_model, context_window=args.context_window)
+    analyze = analyzer.analyze_article_batch if args.batch else analyzer.analyze_article
     
-    # Save results in analysis_log folder with timestamp
+    # Stream results to the analysis_log folder with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     article_id = args.url.split('/')[-1]
-    output_filename = os.path.join("analysis_log", f"article_analysis_{article_id}_{timestamp}.json")
-    analyzer.save_results(results, output_filename)
+    output_filename = os.path.join("analysis_log", f"article_analysis_{article_id}_{timestamp}.ndjson")
+    results = analyze(args.url, max_sentences=args.sentences, max_claims=args.claims, skip_sentences=args.skip,
+                      output_file=output_filename)
     
     # Print summary
     total_sentences = len(results)
@@ -1,3 +1,7 @@
+import asyncio
+import os
+
+import aiohttp
 import arxiv
 
 # Construct the default API client.
@@ -12,12 +16,29 @@ search = arxiv.Search(
   sort_by = arxiv.SortCriterion.SubmittedDate
 )
 
-results = client.results(search)
-c = 0
-for r in client.results(search):
-  c+=1
+OUTPUT_DIR = "files/linguistic/"
+# arxiv asks API users not to open more than a few connections at once
+MAX_CONCURRENT_DOWNLOADS = 3
+
+async def download_pdf(session, semaphore, r):
+  path = os.path.join(OUTPUT_DIR, r.title + ".pdf")
+  if os.path.exists(path):
+    print(f"Already downloaded {r.title}")
+    return
   try:
-    r.download_pdf("files/linguistic/", r.title + ".pdf")
-  except:
+    async with semaphore, session.get(r.pdf_url) as response:
+      response.raise_for_status()
+      with open(path, "wb") as f:
+        async for chunk in response.content.iter_chunked(65536):
+          f.write(chunk)
+  except Exception:
     print(f"Error downloading {r.title}")
-    continue
\ No newline at end of file
+    if os.path.exists(path):
+      os.remove(path)
+
+async def download_all(papers):
+  semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+  async with aiohttp.ClientSession() as session:
+    await asyncio.gather(*(download_pdf(session, semaphore, r) for r in papers))
+
+asyncio.run(download_all(list(client.results(search))))
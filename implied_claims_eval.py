@@ -3,33 +3,62 @@ Implied Claims Evaluation
 
 This eval tests a model's ability to generate implied claims from a given statement
 and then uses an LLM judge to compare generated claims against gold-standard implied claims.
+
+Samples run concurrently, up to max_connections model requests at once (16 suits hosted APIs;
+use about 4 for a local vLLM server). The number of samples in flight can also be capped with
+`--max-samples`. For Ollama, set OLLAMA_NUM_PARALLEL on the server to at least max_connections,
+otherwise requests queue there anyway.
 """
 
 from typing import Optional, Generator, List, Dict, Any
 from inspect_ai import Task, task
 from inspect_ai.dataset import Sample
-from inspect_ai.scorer import Score, scorer, CORRECT, INCORRECT, accuracy,match
-from inspect_ai.solver import system_message, generate
-import json
+from inspect_ai.model import ChatMessageAssistant, GenerateConfig, ModelOutput
+from inspect_ai.scorer import Score, scorer, CORRECT, INCORRECT, accuracy
+from inspect_ai.solver import Generate, Solver, TaskState, solver
+import asyncio
+import functools
+import hashlib
+import mmap
+import orjson
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from inspect_ai.tool import bash, python
-from inspect_ai.agent import Agent, agent, react
+from inspect_ai.agent import Agent, agent, as_solver, react
 
 CMD_TIMEOUT = 180
 
-@agent
-def my_agent(attempts = 1, instructions = False) -> Agent:
+# Host directory mounted (read-only) into the sandbox at /app/files
+FILES_DIR = Path("files")
+# Sandbox directory holding the text extracted from each sample's PDFs by setup_script()
+TEXT_DIR = "/app/text"
+# Verdicts from previous runs, keyed on the judged files, the prompt and the model
+JUDGE_CACHE_DIR = Path(".judge_cache")
+
+# One "[i] Y" / "[i] N" verdict line per paper in a batched sample, in either case
+VERDICT_LINE = re.compile(r'^\s*\[(\d+)\]\s*([YN])\b', re.MULTILINE | re.IGNORECASE)
+
+def agent_prompt(instructions = False, batch_size = 1) -> str:
     extra = ""
     if instructions:
         extra = "\nFirst, generate a list of 10 claims which may be implied by the abstract. Then, determine if each one is supported by the paper. If any claim is determined to be misleading, mark the abstract as misleading.\n"
-    prompt = f"""Does this paper's abstract seem accurate, such that a naive reader taking the abstract a face value would not be misled?
+    answer_format = """Submit an answer which consists solely of "Y" if the abstract is misleading or or "N" if it is not misleading."""
+    if batch_size > 1:
+        answer_format = """Several papers are listed, numbered [1], [2], .... Answer the question separately for each paper.
+Submit an answer with one line per paper and nothing else: "[i] Y" if the abstract of paper [i] is misleading or "[i] N" if it is not misleading."""
+    return f"""Does this paper's abstract seem accurate, such that a naive reader taking the abstract a face value would not be misled?
 {extra}
-The paper and preregistration are stored in `/app/files`.
+The paper and preregistration are stored in `/app/files`. Their text has already been extracted to `/app/text/<file name>.txt`; read those text files rather than parsing the PDFs again.
 
-Submit an answer which consists solely of "Y" if the abstract is misleading or or "N" if it is not misleading.
+{answer_format}
     """
+
+@agent
+def my_agent(attempts = 1, instructions = False, batch_size = 1) -> Agent:
     return react(
-        prompt=prompt,
+        prompt=agent_prompt(instructions, batch_size),
         tools = [
                 bash(CMD_TIMEOUT), 
                 python(CMD_TIMEOUT)
@@ -37,22 +66,217 @@ Submit an answer which consists solely of "Y" if the abstract is misleading or o
         attempts=attempts
     )
 
+def resolve_file(name: str) -> Path:
+    """Path of a sample's file in FILES_DIR; a name missing its ".pdf" suffix resolves to the PDF."""
+    path = FILES_DIR / name
+    if not path.is_file() and path.with_name(path.name + ".pdf").is_file():
+        return path.with_name(path.name + ".pdf")
+    return path
+
+def setup_script(files: List[str]) -> str:
+    """
+    Sandbox setup script that extracts the text of the sample's PDFs once, before the agent starts,
+    so its tool calls read plain text instead of re-parsing a PDF each time. PDF parsing is
+    CPU-bound, so the files are extracted in parallel processes. A PDF that fails to parse gets
+    no text file, leaving the agent to read the PDF itself, and does not fail the setup.
+    """
+    # FILES_DIR is mounted at /app/files, so names resolved on the host are valid in the sandbox
+    names = [resolve_file(name).name for name in files]
+    return f"""mkdir -p {TEXT_DIR}
+python3 - <<'EOF'
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pdfminer.high_level import extract_text
+
+def extract(name):
+    source = os.path.join("/app/files", name)
+    if not os.path.isfile(source):
+        return
+    try:
+        text = extract_text(source)
+    except Exception as e:
+        print(f"Could not extract text from {{source}}: {{e}}")
+        return
+    with open(os.path.join("{TEXT_DIR}", os.path.basename(source) + ".txt"), "w") as f:
+        f.write(text)
+
+# fork, because this script is read from stdin and cannot be re-imported by spawned workers
+with ProcessPoolExecutor(mp_context=multiprocessing.get_context("fork")) as pool:
+    list(pool.map(extract, {names!r}))
+EOF
+"""
+
+@functools.lru_cache(maxsize=None)
+def file_sha256(name: str) -> str:
+    """SHA-256 of a file in FILES_DIR, computed once per process."""
+    path = resolve_file(name)
+    if not path.is_file():
+        # Placeholders such as "(none)" have no file, so their name stands in for the contents
+        return hashlib.sha256(name.encode()).hexdigest()
+    if path.stat().st_size == 0:
+        return hashlib.sha256(b"").hexdigest()
+    # Hash the mapped file in place rather than copying a large PDF into memory first
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return hashlib.sha256(mapped).hexdigest()
+
+def prehash_files(names: List[str]) -> None:
+    """Fill file_sha256's cache for `names` in parallel threads (hashlib releases the GIL)."""
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(file_sha256, set(names)))
+
+def judge_cache_key(file_hashes: List[str], prompt: str, model: str) -> str:
+    """Key for a judge verdict: SHA-256 over the hashes of the judged files, the prompt and the model."""
+    digest = hashlib.sha256()
+    for file_hash in file_hashes:
+        digest.update(bytes.fromhex(file_hash))
+    digest.update(prompt.encode())
+    digest.update(model.encode())
+    return digest.hexdigest()[:16]
+
+# Verdicts already judged or loaded in this process, so identical samples (e.g. across the tasks
+# of one sweep) reach the disk cache or the judge once. The lock per key makes concurrent
+# identical samples wait for the first one instead of all running the judge.
+_JUDGE_VERDICTS: Dict[str, str] = {}
+_JUDGE_LOCKS: Dict[str, asyncio.Lock] = {}
+
+@solver
+def judge_cache(judge: Solver, prompt: str) -> Solver:
+    """
+    Reuse the verdict of an earlier sample or run on the same files, prompt and model, held in
+    memory and stored in JUDGE_CACHE_DIR, instead of running `judge`. Only meaningful with
+    temperature 0.
+    """
+    
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        file_hashes = state.metadata.get("file_hashes") or [
+            file_sha256(name) for name in state.metadata["papers"] + state.metadata["preregistrations"]
+        ]
+        key = judge_cache_key(file_hashes, prompt + state.input_text, str(state.model))
+        async with _JUDGE_LOCKS.setdefault(key, asyncio.Lock()):
+            completion = _JUDGE_VERDICTS.get(key)
+            path = JUDGE_CACHE_DIR / f"{key}.json"
+            if completion is None and path.is_file():
+                completion = _JUDGE_VERDICTS[key] = orjson.loads(path.read_bytes())["completion"]
+            if completion is not None:
+                state.messages.append(ChatMessageAssistant(content=completion))
+                state.output = ModelOutput.from_content(model=str(state.model), content=completion)
+                return state
+            
+            state = await judge(state, generate)
+            if state.output.completion:
+                _JUDGE_VERDICTS[key] = state.output.completion
+                JUDGE_CACHE_DIR.mkdir(exist_ok=True)
+                path.write_bytes(orjson.dumps({"completion": state.output.completion}))
+            return state
+    
+    return solve
+
+def final_token(completion: str) -> str:
+    """Last whitespace-separated token of the completion, without surrounding quotes or punctuation."""
+    # rsplit with maxsplit=1 scans from the end, so only the tail of a long transcript is touched
+    tokens = completion.rsplit(None, 1)
+    return tokens[-1].strip("\"'`*.,:;!()[]") if tokens else ""
+
+@scorer(metrics=[accuracy()])
+def final_verdict():
+    """
+    Scorer for single-paper samples: compares the final Y/N token of the answer with the target,
+    ignoring case.
+    """
+    
+    async def score(state, target) -> Score:
+        answer = final_token(state.output.completion)
+        return Score(
+            value=CORRECT if answer.casefold() == target.text.strip().casefold() else INCORRECT,
+            answer=answer
+        )
+    
+    return score
+
+@scorer(metrics=[accuracy()])
+def indexed_verdicts():
+    """
+    Scorer for batched samples: compares each "[i] Y/N" line of the answer with the i-th
+    "|"-separated verdict in the target, scoring the fraction that match.
+    """
+    
+    async def score(state, target) -> Score:
+        expected = target.text.split("|")
+        verdicts = {int(i): verdict.upper() for i, verdict in VERDICT_LINE.findall(state.output.completion)}
+        correct = sum(verdicts.get(i) == verdict.strip().upper() for i, verdict in enumerate(expected, start=1))
+        return Score(
+            value=correct / len(expected),
+            answer="|".join(verdicts.get(i, "?") for i in range(1, len(expected) + 1)),
+            explanation=f"{correct} of {len(expected)} verdicts correct"
+        )
+    
+    return score
+
 @task
-def implied_claims_generation(dataset_file: Optional[str] = None) -> Task:
+def implied_claims_generation(dataset_file: Optional[str] = None, batch_size: int = 1,
+                              use_judge_cache: bool = False, max_connections: int = 16,
+                              instructions: bool = False) -> Task:
     """
     Create an implied claims evaluation task.
+    
+    With instructions, the agent is told to list the claims implied by the abstract and check
+    each one against the paper before answering.
+    
+    With batch_size > 1, that many (paper, preregistration) pairs are judged in a single agent
+    run and scored with indexed_verdicts().
+    
+    With use_judge_cache, the model runs at temperature 0 and verdicts are cached on disk, so
+    reruns skip (paper, preregistration) pairs already judged with the same prompt and model.
     """
+    judge = my_agent(instructions=instructions, batch_size=batch_size)
+    if use_judge_cache:
+        judge = judge_cache(as_solver(judge), agent_prompt(instructions, batch_size))
 
     return Task(
-        dataset=list(create_samples(dataset_file)), 
-        solver=my_agent(),
+        dataset=load_samples(dataset_file, batch_size, hash_files=use_judge_cache), 
+        solver=judge,
         sandbox=("docker", "compose.yaml"),
-        scorer=match()
+        scorer=final_verdict() if batch_size == 1 else indexed_verdicts(),
+        config=GenerateConfig(
+            max_connections=max_connections,
+            temperature=0 if use_judge_cache else None,
+            # Each agent turn resends the whole transcript; let the provider cache the unchanged prefix
+            cache_prompt=True
+        )
     )
 
 
-def create_samples(dataset_file: Optional[str] = None) -> Generator[Sample, None, None]:
-    """Create samples from dataset file or default examples."""
+@functools.lru_cache(maxsize=8)
+def _cached_samples(dataset_file: Optional[str], mtime: float, batch_size: int,
+                    hash_files: bool) -> tuple:
+    return tuple(create_samples(dataset_file, batch_size, hash_files))
+
+def load_samples(dataset_file: Optional[str] = None, batch_size: int = 1,
+                 hash_files: bool = False) -> List[Sample]:
+    """
+    create_samples() as a list, built once per process for each dataset file version so that
+    the tasks of a sweep share it. Each call gets its own shallow copies of the samples.
+    """
+    # create_samples() does not read the dataset file yet, so a missing one is not an error
+    mtime = os.path.getmtime(dataset_file) if dataset_file and os.path.exists(dataset_file) else 0.0
+    return [sample.model_copy() for sample in _cached_samples(dataset_file, mtime, batch_size, hash_files)]
+
+def sample_hashes(files: List[str], hash_files: bool) -> Dict[str, Any]:
+    """The "file_hashes" metadata entry for `files`, or nothing unless hash_files is set."""
+    return {"file_hashes": [file_sha256(name) for name in files]} if hash_files else {}
+
+def create_samples(dataset_file: Optional[str] = None, batch_size: int = 1,
+                   hash_files: bool = False) -> Generator[Sample, None, None]:
+    """
+    Create samples from dataset file or default examples.
+    
+    With batch_size > 1, consecutive examples are grouped into one sample whose input lists them
+    as [1]..[b] and whose target is their verdicts joined with "|", e.g. "Y|N|N|Y".
+    
+    With hash_files, each sample's metadata also holds the SHA-256 of its papers and then its
+    preregistrations under "file_hashes", for the judge cache.
+    """
     
     # Default sample data if no file provided
     default_samples = [
@@ -98,12 +322,43 @@ def create_samples(dataset_file: Optional[str] = None) -> Generator[Sample, None
         },
     ]
     
-    template = """Paper: {paper}
-Preregistration plan: {preregistration}"""
+    if hash_files:
+        prehash_files([sample_data[key] for sample_data in default_samples for key in ("paper", "preregistration")])
+
+    if batch_size == 1:
+        for sample_data in default_samples:
+            paper, preregistration = sample_data["paper"], sample_data["preregistration"]
+            yield Sample(
+                input=f"Paper: {paper}\nPreregistration plan: {preregistration}",
+                target=sample_data["target"],
+                metadata={
+                    "papers": [paper],
+                    "preregistrations": [preregistration],
+                    **sample_hashes([paper, preregistration], hash_files)
+                },
+                setup=setup_script([paper, preregistration])
+            )
+        return
     
-    for sample_data in default_samples:        
+    for start in range(0, len(default_samples), batch_size):
+        batch = default_samples[start:start + batch_size]
         yield Sample(
-            input=template.format(paper= sample_data['paper'], preregistration=sample_data['preregistration']),
-            target=sample_data["target"],
-            metadata={}
+            input="\n".join(
+                f"[{i}] Paper: {sample_data['paper']}\nPreregistration plan: {sample_data['preregistration']}"
+                for i, sample_data in enumerate(batch, start=1)
+            ),
+            target="|".join(sample_data["target"] for sample_data in batch),
+            metadata={
+                "papers": [sample_data["paper"] for sample_data in batch],
+                "preregistrations": [sample_data["preregistration"] for sample_data in batch],
+                **sample_hashes(
+                    [sample_data["paper"] for sample_data in batch] +
+                    [sample_data["preregistration"] for sample_data in batch],
+                    hash_files
+                )
+            },
+            setup=setup_script(
+                [sample_data["paper"] for sample_data in batch] +
+                [sample_data["preregistration"] for sample_data in batch]
+            )
         )
\ No newline at end of file
@@ -4,18 +4,46 @@ Script to parse the most recent .eval file and move PDFs marked as "I" to files/
 """
 import os
 import shutil
-import glob
-from inspect_ai.analysis import samples_df
+from concurrent.futures import ThreadPoolExecutor
+from inspect_ai.log import read_eval_log_samples
+
+USABLE_DIR = "files/linguistic/usable"
 
 def get_most_recent_eval_file(logs_dir="logs"):
     """Find the most recent .eval file in the logs directory"""
-    eval_files = glob.glob(os.path.join(logs_dir, "*.eval"))
-    if not eval_files:
-        raise FileNotFoundError("No .eval files found in logs directory")
-    
-    # Sort by modification time, newest first
-    eval_files.sort(key=os.path.getmtime, reverse=True)
-    return eval_files[0]
+    # Single pass over the directory; DirEntry caches its stat result
+    with os.scandir(logs_dir) as entries:
+        try:
+            newest = max(
+                (entry for entry in entries if entry.name.endswith(".eval") and entry.is_file()),
+                key=lambda entry: entry.stat().st_mtime
+            )
+        except ValueError:
+            raise FileNotFoundError("No .eval files found in logs directory") from None
+    return newest.path
+
+def incorrect_papers(eval_path):
+    """Yield the paper of each sample graded "I", reading samples from the log one at a time"""
+    for sample in read_eval_log_samples(eval_path, all_samples_required=False):
+        score = (sample.scores or {}).get('model_graded_qa')
+        if score is not None and score.value == 'I':
+            yield sample.metadata['paper']
+
+def move_pdf(source_path):
+    """Move one PDF to USABLE_DIR, reporting whether it was found"""
+    target_path = os.path.join(USABLE_DIR, source_path.rsplit('/', 1)[-1])
+    try:
+        # A single rename syscall when both paths are on one filesystem, the usual case
+        os.rename(source_path, target_path)
+    except FileNotFoundError:
+        if os.path.exists(source_path):
+            raise
+        print(f"File not found: {source_path}")
+        return
+    except OSError:
+        # e.g. EXDEV across filesystems; shutil.move copies and unlinks instead
+        shutil.move(source_path, target_path)
+    print(f"Moved: {os.path.basename(target_path)}")
 
 def main():
     try:
@@ -23,20 +51,10 @@ def main():
         most_recent_eval = get_most_recent_eval_file()
         print(f"Processing most recent eval file: {most_recent_eval}")
         
-        # Parse the eval file
-        samples = samples_df(most_recent_eval)
-        print(f"Loaded {len(samples)} samples from eval file")
-
-        incorrect = samples[samples['score_model_graded_qa'] == 'I']
-        source_paths = incorrect['metadata_paper'].tolist()
-        for source_path in source_paths:
-            filename = source_path.split('/')[-1]
-            target_path = os.path.join("files/linguistic/usable", filename)
-            if os.path.exists(source_path):
-                shutil.move(source_path, target_path)
-                print(f"Moved: {filename}")
-            else:
-                print(f"File not found: {source_path}")
+        # Stream the samples, overlapping the per-file disk operations
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            moved = list(pool.map(move_pdf, incorrect_papers(most_recent_eval)))
+        print(f"Found {len(moved)} samples marked I in eval file")
             
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,40 @@
+"""
+Implied Claims Prompt Variants
+
+Runs the implied claims eval's prompt variants as parallel tasks in a single eval, sharing the
+model connection pool and the docker sandbox configuration.
+
+To run:
+```
+uv run python run_all.py --model openai/gpt-5
+```
+"""
+
+import argparse
+from inspect_ai import eval, task_with
+from implied_claims_eval import implied_claims_generation
+
+VARIANTS = {
+    "v1": {},
+    "v2_instructions": {"instructions": True},
+    "v3_batch4": {"batch_size": 4},
+    "v4_instructions_batch4": {"instructions": True, "batch_size": 4},
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all implied claims prompt variants in parallel")
+    parser.add_argument("--model", required=True, help="Model to evaluate, e.g. openai/gpt-5")
+    parser.add_argument("--use-judge-cache", action="store_true", help="Reuse cached verdicts from previous runs")
+    args = parser.parse_args()
+    
+    tasks = [
+        task_with(
+            implied_claims_generation(use_judge_cache=args.use_judge_cache, **params),
+            name=f"implied_claims_{name}"
+        )
+        for name, params in VARIANTS.items()
+    ]
+    eval(tasks, model=args.model, max_tasks=len(tasks))
+
+if __name__ == "__main__":
+    main()
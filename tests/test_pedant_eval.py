@@ -0,0 +1,35 @@
+import pytest
+
+from pedant_eval import extract_final_number
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0.3", 0.3),
+    ("Some analysis.\n\n0.75\n", 0.75),
+    ("Analysis.\nProbability: 0.3", 0.3),
+    ("Analysis.\n.5", 0.5),
+    ("1", 1.0),
+    ("0", 0.0),
+    ("3e-1", 0.3),
+])
+def test_extract_final_number_parses_a_final_probability(text, expected):
+    assert extract_final_number(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   \n",
+    "1,000",
+    "0,3",
+    "2/3",
+    "The study was published in 2024",
+    "Analysis.\n... in 2024",
+    "Analysis.\nversion v2",
+    "1.5",
+    "-0.1",
+    "Probability: 75",
+    "0.3 or 0.4",
+    "0.3\nThat is my answer.",
+])
+def test_extract_final_number_rejects_anything_else(text):
+    assert extract_final_number(text) is None